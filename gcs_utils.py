@@ -5,17 +5,26 @@ Unified local + GCS file utilities.
 Requirements (only if you use gs://):
   pip install fsspec gcsfs openpyxl pandas
 
+Optional: pip install python-calamine (much faster Excel reads; openpyxl is used otherwise)
+
 Auth for GCS:
   - Locally: export GOOGLE_APPLICATION_CREDENTIALS=/path/to/key.json
   - Or: `gcloud auth application-default login`
   - In GCE/GKE/CloudRun: use the default service account with proper permissions.
+
+Optional: set REPORT_MAKER_CACHE_DIR to cache parsed workbooks (pickled, keyed by
+path + mtime/size or GCS generation) in that directory. Off by default.
 """
 
 from __future__ import annotations
+import hashlib
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from io import BytesIO
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Iterable, Optional, Tuple, Union
 
 import pandas as pd
 
@@ -42,16 +51,31 @@ def ensure_gcs():
             f"Import error: {e}"
         )
 
+_GCS_FS = None
+_GCS_UPLOAD_BLOCK_SIZE = 8 * 1024 * 1024  # multiple of 256 KiB, as GCS resumable uploads require
+_GCS_FS_LOCK = threading.Lock()
+
+def _gcs_fs():
+    """
+    Process-wide gcsfs filesystem, created once (thread-safe) and reused so
+    credentials and keep-alive HTTP connections are shared by every gs:// call.
+    """
+    global _GCS_FS
+    if _GCS_FS is None:
+        with _GCS_FS_LOCK:
+            if _GCS_FS is None:
+                ensure_gcs()
+                import gcsfs
+                _GCS_FS = gcsfs.GCSFileSystem()
+    return _GCS_FS
+
 # ----------------- Text I/O -----------------
 def read_text_any(path_str: str, encoding: str = "utf-8") -> str:
     """
     Read a UTF-8 text file from local or gs://.
     """
     if is_gcs_path(path_str):
-        ensure_gcs()
-        import fsspec
-        with fsspec.open(path_str, mode="rt", encoding=encoding) as f:
-            return f.read()
+        return read_bytes_any(path_str).decode(encoding)
     else:
         return Path(path_str).read_text(encoding=encoding)
 
@@ -68,10 +92,8 @@ def read_bytes_any(path_str: str) -> bytes:
     Read bytes from local or gs://.
     """
     if is_gcs_path(path_str):
-        ensure_gcs()
-        import fsspec
-        with fsspec.open(path_str, mode="rb") as f:
-            return f.read()
+        # single GET; no size/metadata probe as with open().read()
+        return _gcs_fs().cat_file(path_str)
     else:
         return Path(path_str).read_bytes()
 
@@ -80,17 +102,144 @@ def write_bytes_any(path_str: str, data: bytes) -> None:
     Write bytes to local or gs://.
     """
     if is_gcs_path(path_str):
-        ensure_gcs()
-        import fsspec
-        # parent dirs in GCS are logical; no need to mkdir
-        with fsspec.open(path_str, mode="wb") as f:
-            f.write(data)
+        # parent dirs in GCS are logical; no need to mkdir. Single upload request.
+        _gcs_fs().pipe_file(path_str, data)
     else:
         p = Path(path_str)
         p.parent.mkdir(parents=True, exist_ok=True)
         p.write_bytes(data)
 
+_GLOB_CHARS = frozenset("*?[")
+
+def cat_gcs_many(paths: Iterable[str]) -> Dict[str, Union[bytes, Exception]]:
+    """
+    Fetch several gs:// objects with a single batched fs.cat() call (gcsfs runs
+    the GETs concurrently).
+    Returns {original gs:// path: bytes, or the exception its GET raised}.
+    fs.cat() expands glob patterns, so keys containing * ? [ are fetched one by
+    one with cat_file() instead.
+    """
+    fs = _gcs_fs()
+    out: Dict[str, Union[bytes, Exception]] = {}
+    by_key: Dict[str, str] = {}
+    for p in paths:
+        if _GLOB_CHARS.isdisjoint(p):
+            by_key[fs._strip_protocol(p)] = p
+            continue
+        try:
+            out[p] = fs.cat_file(p)
+        except Exception as e:
+            out[p] = e
+    if by_key:
+        blobs = fs.cat(list(by_key), on_error="return")
+        out.update({by_key[k]: v for k, v in blobs.items() if k in by_key})
+    return out
+
+# ----------------- Parsed-workbook cache -----------------
+def _cache_dir() -> Optional[Path]:
+    """
+    Opt-in: the cache is used only when REPORT_MAKER_CACHE_DIR is set.
+    """
+    d = os.getenv("REPORT_MAKER_CACHE_DIR")
+    return Path(d) if d else None
+
+def _cache_file(path_str: str, sheet_name=0) -> Optional[Path]:
+    """
+    Cache location for the current version of a workbook, or None if caching is off.
+    Name = <hash of path+sheet>-<hash of version>, so a changed source gets a new file.
+    The version check costs a stat (an info() request for gs://), so it must only run
+    when caching is on; with it off, reads stay a single GET.
+    """
+    cache_dir = _cache_dir()
+    if cache_dir is None:
+        return None  # before any stat/info call
+    if is_gcs_path(path_str):
+        info = _gcs_fs().info(path_str)
+        source = path_str
+        version = f"{info.get('generation') or info.get('updated')}|{info.get('size')}"
+    else:
+        p = Path(path_str).resolve()
+        st = p.stat()
+        source = str(p)
+        version = f"{st.st_mtime_ns}|{st.st_size}"
+    stem = hashlib.sha1(f"{source}|{sheet_name}".encode()).hexdigest()
+    return cache_dir / f"{stem}-{hashlib.sha1(version.encode()).hexdigest()[:16]}.pkl"
+
+def _cache_lookup(path_str: str, sheet_name=0) -> Tuple[Optional[pd.DataFrame], Optional[Path]]:
+    """
+    Returns (cached DataFrame or None, cache file to store into or None).
+    Never raises: any problem just means a cache miss.
+    """
+    try:
+        cache_file = _cache_file(path_str, sheet_name)
+    except Exception:
+        return None, None
+    if cache_file is not None and cache_file.exists():
+        try:
+            return pd.read_pickle(cache_file), cache_file
+        except Exception as e:
+            print(f"[WARN] Ignoring unreadable cache for {path_str}: {e}")
+    return None, cache_file
+
+def _cache_store(cache_file: Optional[Path], df: Optional[pd.DataFrame]) -> None:
+    if cache_file is None or df is None:
+        return
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        stem = cache_file.name.split("-", 1)[0]
+        for stale in cache_file.parent.glob(f"{stem}-*.pkl"):
+            if stale != cache_file:
+                stale.unlink(missing_ok=True)
+        tmp = cache_file.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        df.to_pickle(tmp)
+        os.replace(tmp, cache_file)  # atomic: concurrent readers never see a partial file
+    except Exception as e:
+        print(f"[WARN] Could not cache parsed workbook {cache_file}: {e}")
+
 # ----------------- Excel I/O -----------------
+try:  # probed once at import; the Rust calamine reader beats any openpyxl path
+    import python_calamine  # noqa
+    _HAS_CALAMINE = True
+except ImportError:
+    _HAS_CALAMINE = False
+
+def _parse_excel(path_str: str, src, sheet_name=0) -> pd.DataFrame:
+    """
+    Parse a local path or in-memory buffer with calamine when installed; otherwise
+    (or if calamine fails) with pd.read_excel(engine="openpyxl").
+    """
+    df = None
+    if _HAS_CALAMINE:
+        try:
+            df = pd.read_excel(src, engine="calamine", sheet_name=sheet_name)
+        except Exception as e:
+            print(f"[WARN] calamine read failed for {path_str}, retrying with openpyxl: {e}")
+            if hasattr(src, "seek"):
+                src.seek(0)
+    if df is None:
+        df = pd.read_excel(src, engine="openpyxl", sheet_name=sheet_name)
+    cols = df.columns
+    if not all(isinstance(c, str) and c == c.strip() for c in cols):
+        df.columns = [str(c).strip() for c in cols]
+    return df
+
+def _parse_excel_blob(path_str: str, data: Union[bytes, Exception, None], sheet_name=0) -> Optional[pd.DataFrame]:
+    """
+    Parse an already-downloaded object (or the exception fetching it raised);
+    None, with a warning or error, if it was missing or unreadable.
+    """
+    if data is None or isinstance(data, FileNotFoundError):
+        print(f"[WARN] Missing file: {path_str}")
+        return None
+    if isinstance(data, Exception):
+        print(f"[ERROR] Failed to read {path_str}: {data}")
+        return None
+    try:
+        return _parse_excel(path_str, BytesIO(data), sheet_name=sheet_name)
+    except Exception as e:
+        print(f"[ERROR] Failed to read {path_str}: {e}")
+        return None
+
 def read_excel_any(path_str: str, sheet_name=0) -> Optional[pd.DataFrame]:
     """
     Read an Excel file from local or gs:// into a DataFrame.
@@ -98,31 +247,166 @@ def read_excel_any(path_str: str, sheet_name=0) -> Optional[pd.DataFrame]:
     """
     try:
         if is_gcs_path(path_str):
-            ensure_gcs()
-            # pandas + fsspec/gcsfs works with storage_options
-            df = pd.read_excel(path_str, engine="openpyxl", sheet_name=sheet_name, storage_options={})
+            src = None
         else:
-            p = Path(path_str)
-            if not p.exists():
-                print(f"[WARN] Missing file: {p}")
+            src = Path(path_str)
+            if not src.exists():
+                print(f"[WARN] Missing file: {src}")
                 return None
-            df = pd.read_excel(p, engine="openpyxl", sheet_name=sheet_name)
-        df.columns = [str(c).strip() for c in df.columns]
+        df, cache_file = _cache_lookup(path_str, sheet_name)
+        if df is not None:
+            return df
+        if src is None:
+            src = BytesIO(read_bytes_any(path_str))
+        df = _parse_excel(path_str, src, sheet_name=sheet_name)
+        _cache_store(cache_file, df)
         return df
     except Exception as e:
         print(f"[ERROR] Failed to read {path_str}: {e}")
         return None
 
+def read_excel_many(paths: Iterable[str], max_workers: int = 16) -> Dict[str, Optional[pd.DataFrame]]:
+    """
+    Read several Excel files (local and/or gs://) concurrently.
+    Each distinct path is read once; returns {path: DataFrame or None}.
+    gs:// objects not in the parsed-workbook cache are fetched up front in one
+    batched request, then parsed.
+    """
+    unique = list(dict.fromkeys(paths))
+    if not unique:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(unique))) as ex:
+        gcs_paths = [p for p in unique if is_gcs_path(p)]
+        cached = dict(zip(gcs_paths, ex.map(_cache_lookup, gcs_paths)))
+        to_fetch = [p for p in gcs_paths if cached[p][0] is None]
+        blobs: Dict[str, Union[bytes, Exception]] = {}
+        if to_fetch:
+            try:
+                blobs = cat_gcs_many(to_fetch)
+            except Exception as e:  # e.g. auth failure: reported against every path
+                blobs = {p: e for p in to_fetch}
+
+        def _load(p: str) -> Optional[pd.DataFrame]:
+            if not is_gcs_path(p):
+                return read_excel_any(p)
+            df, cache_file = cached[p]
+            if df is None:
+                df = _parse_excel_blob(p, blobs.get(p))
+                _cache_store(cache_file, df)
+            return df
+
+        return dict(zip(unique, ex.map(_load, unique)))
+
+_INF = float("inf")
+
+def _sheet_rows(df: pd.DataFrame):
+    """
+    Yield plain-Python row tuples for the writers below: missing values -> None and
+    +/-inf -> "inf"/"-inf" (to_excel's inf_rep; neither writer can store infinities).
+    """
+    rows = df.astype(object).where(df.notna(), None)
+    pos_inf, neg_inf = df.isin([_INF]), df.isin([-_INF])
+    if pos_inf.to_numpy().any() or neg_inf.to_numpy().any():
+        rows = rows.mask(pos_inf, "inf").mask(neg_inf, "-inf")
+    return rows.itertuples(index=False, name=None)
+
+try:  # probed once at import; xlsxwriter is the faster streaming writer
+    import xlsxwriter
+    _XLSX_ENGINE = "xlsxwriter"
+except ImportError:
+    _XLSX_ENGINE = "openpyxl"
+
+_XLSXWRITER_OPTIONS = {
+    "constant_memory": True,        # flush each row to disk as it is written
+    "strings_to_formulas": False,   # no per-cell formula/URL detection
+    "strings_to_urls": False,
+    "default_date_format": "yyyy-mm-dd hh:mm:ss",
+}
+
+_XLSX_ZIP64_ROWS = 1_000_000  # beyond this the sheet XML can pass the 4 GiB zip32 member limit
+
+_XLSX_MAX_ROWS, _XLSX_MAX_COLS = 1_048_576, 16_384
+
+def _check_sheet_sizes(dfs: Dict[str, pd.DataFrame]) -> None:
+    """
+    Raise before writing anything if a sheet (header row included) exceeds Excel's
+    limits; the streaming writers would otherwise drop the overflow silently.
+    """
+    for sheet, df in dfs.items():
+        rows, cols = len(df) + 1, len(df.columns)
+        if rows > _XLSX_MAX_ROWS or cols > _XLSX_MAX_COLS:
+            raise ValueError(
+                f"This sheet is too large! Sheet {sheet!r} is {rows} x {cols}; "
+                f"Excel's max sheet size is {_XLSX_MAX_ROWS} x {_XLSX_MAX_COLS}"
+            )
+
+def _write_xlsxwriter(dfs: Dict[str, pd.DataFrame], target) -> None:
+    wb = xlsxwriter.Workbook(target, _XLSXWRITER_OPTIONS)
+    try:
+        if sum(len(df) for df in dfs.values()) > _XLSX_ZIP64_ROWS:
+            wb.use_zip64()
+        header_fmt = wb.add_format({"bold": True})
+        for sheet, df in dfs.items():
+            ws = wb.add_worksheet(sheet)
+            ws.write_row(0, 0, list(df.columns), header_fmt)
+            for r, row in enumerate(_sheet_rows(df), start=1):
+                ws.write_row(r, 0, row)
+    finally:
+        wb.close()  # also releases the constant_memory temp files
+
+def _write_openpyxl_write_only(dfs: Dict[str, pd.DataFrame], target) -> None:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    wb = Workbook(write_only=True)
+    for sheet, df in dfs.items():
+        ws = wb.create_sheet(sheet)
+        header = []
+        for c in df.columns:
+            cell = WriteOnlyCell(ws, value=c)
+            cell.font = Font(bold=True)
+            header.append(cell)
+        ws.append(header)
+        for row in _sheet_rows(df):
+            ws.append(row)
+    wb.save(target)
+
+def _to_xlsx_fast(dfs: Dict[str, pd.DataFrame], target) -> None:
+    """
+    Stream DataFrames into an .xlsx (one sheet per key) row by row, without
+    building a full in-memory cell model: xlsxwriter in constant_memory mode
+    when installed, otherwise openpyxl's write-only workbook.
+    `target` is a local path or a binary file-like object (e.g. BytesIO).
+    """
+    _check_sheet_sizes(dfs)
+    if _XLSX_ENGINE == "xlsxwriter":
+        _write_xlsxwriter(dfs, target)
+    else:
+        _write_openpyxl_write_only(dfs, target)
+
 def write_excel_any(dfs: Dict[str, pd.DataFrame], out_path: str) -> None:
     """
     Write one or more DataFrames to an Excel workbook (one sheet per key).
     Works for both local and gs:// destinations.
     """
-    bio = BytesIO()
-    with pd.ExcelWriter(bio, engine="openpyxl") as writer:
-        for sheet, df in dfs.items():
-            df.to_excel(writer, index=False, sheet_name=sheet)
-    write_bytes_any(out_path, bio.getvalue())
+    if is_gcs_path(out_path):
+        # Stream into a resumable upload: peak memory is ~one block, not the whole workbook
+        f = _gcs_fs().open(out_path, mode="wb", block_size=_GCS_UPLOAD_BLOCK_SIZE)
+        try:
+            _to_xlsx_fast(dfs, f)
+        except BaseException:
+            # close() would finalize whatever was buffered as the object; cancel instead
+            # so a failed write leaves any previous report at out_path untouched
+            f.discard()
+            f.closed = True
+            raise
+        f.close()
+    else:
+        p = Path(out_path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        _to_xlsx_fast(dfs, str(p))
 
 # ----------------- Convenience: download/upload -----------------
 def download_gcs_to_local(src_gs_path: str, dst_local_path: str) -> str:
@@ -146,11 +430,19 @@ def upload_local_to_gcs(src_local_path: str, dst_gs_path: str) -> str:
     return dst_gs_path
 
 # ----------------- Env/path expansion -----------------
+# characters that can trigger an expansion; ntpath.expandvars also expands %VAR%
+_EXPAND_CHARS = ("$", "~", "%") if os.name == "nt" else ("$", "~")
+
+@lru_cache(maxsize=1024)
 def expand_env_str(s: str) -> str:
     """
     Expand ${ROOT_PATH}, $VARS, and ~, but keep gs:// intact.
     This lets you set ROOT_PATH='gs://my-bucket/some/prefix' in the environment.
+    Results are memoized (config entries repeat the same prefixes); call
+    expand_env_str.cache_clear() after changing the environment.
     """
+    if not any(c in s for c in _EXPAND_CHARS):
+        return s  # nothing to expand
     root_path = os.getenv("ROOT_PATH", ".")
     s = s.replace("${ROOT_PATH}", root_path)
     # NOTE: os.path.expanduser/vars are safe for gs:// because they don't strip schemes.
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Cell normalization, flag classification and failure-reason parsing shared by
+report_maker.py (consolidated report) and report_maker_gcs.py (per-file reports).
+"""
+
+from __future__ import annotations
+import re
+from functools import lru_cache
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+try:  # orjson parses straight from bytes and is several times faster
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    import json
+    json_loads = json.loads
+
+# ----------------- Normalization -----------------
+def norm_str(v) -> str:
+    if type(v) is str:  # dominant case first
+        return v.strip()
+    if v is None or (isinstance(v, float) and v != v):  # v != v: NaN without pd.isna dispatch
+        return ""
+    return str(v).strip()
+
+def norm_str_series(s: pd.Series) -> pd.Series:
+    """Column-wise norm_str: missing -> "", everything else str(v).strip()."""
+    return s.where(s.notna(), "").astype(str).str.strip()
+
+def norm_id_series(s: pd.Series) -> pd.Series:
+    # vectorized str(x).strip(); pandas>=3 keeps missing as NaN through astype(str), key it "nan" like str() does
+    return s.astype(str).str.strip().fillna("nan")
+
+def first_column(df: pd.DataFrame, label: str) -> pd.Series:
+    """
+    df[label] as a Series. Stripped headers can collide ("Flag" / "Flag "), in which
+    case df[label] would be a DataFrame; the first such column is used.
+    """
+    return df.iloc[:, list(df.columns).index(label)]
+
+# ----------------- Flag classification -----------------
+# Token sets (we always lowercase inputs before testing)
+POS_TOKENS = frozenset({"yes", "y", "true", "1", "pass", "passed", "success", "ok"})
+NA_TOKENS = frozenset({"na", "n/a"})
+FAIL_TOKENS = frozenset({"no", "n", "false", "0", "fail", "failed", "not applicable"})
+FAIL_PREFIXES = ("failed-", "fail-", "error", "exception")
+
+# Cell classes shared by the score_* functions, computed once per distinct token
+EMPTY, PASS, FAIL, NA, FAIL_EXPLICIT, MISSING, OTHER = range(7)
+FAILING = (FAIL, NA, FAIL_EXPLICIT)  # classes New Relic treats as a failing flag
+
+# Lowercased token -> class, one lookup for every known token
+TOKEN_CLASS: Dict[str, int] = {
+    "": EMPTY,
+    "missing": MISSING,  # NA for the classic comparator, neutral everywhere else
+    **{t: PASS for t in POS_TOKENS},
+    **{t: NA for t in NA_TOKENS},
+    **{t: FAIL for t in FAIL_TOKENS},
+}
+
+def _classify_token(s: str) -> int:
+    """Class of an already stripped + lowercased token."""
+    cls = TOKEN_CLASS.get(s)
+    if cls is not None:
+        return cls
+    return FAIL_EXPLICIT if s.startswith(FAIL_PREFIXES) else OTHER  # OTHER: "none", free text
+
+@lru_cache(maxsize=8192)
+def _classify_str(v: str) -> int:
+    return _classify_token(v.strip().lower())
+
+def classify(v) -> int:
+    if isinstance(v, str):
+        return _classify_str(v)
+    return _classify_token(norm_str(v).lower())
+
+def classify_column(col: pd.Series) -> np.ndarray:
+    """classify() per cell as an int8 array; text columns classify each distinct value once."""
+    if isinstance(col.dtype, pd.StringDtype):
+        codes, uniques = pd.factorize(col)  # missing -> -1, i.e. the trailing slot
+        classes = np.array([classify(u) for u in uniques] + [EMPTY], dtype=np.int8)
+        return classes[codes]
+    # mixed object columns: 1, 1.0 and True hash alike but classify differently, so go cell by cell
+    return np.fromiter((classify(v) for v in col.to_numpy(dtype=object)), dtype=np.int8, count=len(col))
+
+# ----------------- Failure reasons (supports failed-str{...}) -----------------
+# One pass per cell; branches are tried in order:
+#   failed-str{...}          -> text inside the braces
+#   failed.../fail-...       -> text after the fail(ed) prefix and separators (or the whole value)
+#   error.../exception...    -> the whole value
+_FAIL_REASON = re.compile(
+    r"""^(?:fail(?:ed)?[-_\s]?[a-z]*\{(?P<braced>.*?)\}"""
+    r"""|(?=failed|fail-)fail(?:ed)?[:\-\s_]*(?P<after>.*)"""
+    r"""|(?:error|exception))""",
+    re.IGNORECASE | re.DOTALL,
+)
+
+def maybe_reason_from_value(value: str) -> Optional[str]:
+    raw = norm_str(value)
+    if not raw:
+        return None
+    m = _FAIL_REASON.match(raw)
+    if m is None:
+        return None
+    if m.group("braced") is not None:
+        return m.group("braced").strip()
+    if m.group("after") is not None:
+        return m.group("after").strip() or raw
+    return raw
+
+# Every value maybe_reason_from_value accepts starts (case-insensitively) with one of these
+REASON_PREFIXES = ("fail", "error", "exception")
+
+def reason_candidates(col: pd.Series) -> np.ndarray:
+    """
+    Boolean mask of the cells that may carry a failure reason, so the regex only
+    runs on those. Text columns test each distinct value once.
+    """
+    if isinstance(col.dtype, pd.StringDtype):
+        codes, uniques = pd.factorize(col)  # missing -> -1, i.e. the trailing slot
+        hits = np.array([norm_str(u).lower().startswith(REASON_PREFIXES) for u in uniques] + [False], dtype=bool)
+        return hits[codes]
+    return norm_str_series(col).str.lower().str.startswith(REASON_PREFIXES).to_numpy(dtype=bool)
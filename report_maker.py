@@ -1,52 +1,40 @@
 #!/usr/bin/env python3
-import json
 import os
 from typing import Dict, List, Optional, Tuple
-import re
 import argparse
+import numpy as np
 import pandas as pd
 
 # --- unified local + GCS I/O (your helper) ---
 from gcs_utils import (
     expand_env_str,      # expands ${ROOT_PATH}, env vars, ~ (works with gs:// too)
-    read_text_any,       # read text from local or gs://
-    read_excel_any,      # read excel from local or gs://
+    read_bytes_any,      # read raw bytes from local or gs://
+    read_excel_many,     # read several excel files concurrently (local or gs://)
     write_excel_any,     # write excel to local or gs://
 )
 
-# ----------------- Helpers -----------------
-def norm_str(v) -> str:
-    if v is None or (isinstance(v, float) and pd.isna(v)):
-        return ""
-    return str(v).strip()
-
-# Token sets (we always lowercase inputs before testing)
-POS_TOKENS = {"yes", "y", "true", "1", "pass", "passed", "success", "ok", "Pass"}
-NEG_TOKENS = {"no", "n", "false", "0", "fail", "failed", "na", "n/a", "not applicable", "none", ""}
-
-def is_yes(v: str) -> bool:
-    return norm_str(v).lower() in POS_TOKENS
-
-def is_no(v: str) -> bool:
-    return norm_str(v).lower() in NEG_TOKENS
+# --- shared cell / flag / reason helpers ---
+from report_common import (
+    json_loads, norm_str_series, norm_id_series, first_column,
+    PASS, FAILING, classify_column,
+    maybe_reason_from_value, reason_candidates,
+)
 
-def is_na(v: str) -> bool:
-    return norm_str(v).lower() in {"na", "n/a", "not applicable", "none", ""}
+# ----------------- Helpers -----------------
+def yes_mask(s: pd.Series) -> np.ndarray:
+    return classify_column(s) == PASS
 
-def is_failed_pattern(v: str) -> bool:
-    s = norm_str(v).lower()
-    return s.startswith("failed-") or s.startswith("fail-") or s.startswith("error") or s.startswith("exception")
+_PREFERRED_ID_COLS = (
+    "Tracking_ID_OR_Unique_Key","Tracking_ID","Unique_Key",
+    "Invoice No.","Invoice_No","Invoice","Tracking ID",
+)
 
 def pick_id_col(cols: List[str]) -> Optional[str]:
-    preferred = [
-        "Tracking_ID_OR_Unique_Key","Tracking_ID","Unique_Key",
-        "Invoice No.","Invoice_No","Invoice","Tracking ID",
-    ]
     exact = {c.strip(): c for c in cols}
-    for p in preferred:
+    for p in _PREFERRED_ID_COLS:
         if p in exact: return exact[p]
     for c in cols:
-        cl = c.lower().replace("_", " ")
+        cl = c.lower()  # keywords contain no "_"/" ", so no separator normalisation needed
         if "invoice" in cl or "tracking" in cl or "unique" in cl:
             return c
     return None
@@ -67,160 +55,153 @@ def detect_kind_from_key(key: str) -> str:
         return "newrelic"
     return "newrelic"
 
-def non_id_columns(row: pd.Series, id_col: str) -> List[str]:
-    return [c for c in row.index if c != id_col]
-
 # --- Robust ID matching ---
-def norm_id_series(s: pd.Series) -> pd.Series:
-    return s.astype(str).map(lambda x: str(x).strip())
+def align_ids(invoices: pd.Series, ids: pd.Series) -> np.ndarray:
+    """
+    Left-join invoices onto a file's (normalized) ID column.
+    Returns, per invoice, the position of the first matching file row, or -1 if missing.
+    """
+    left = pd.DataFrame({"Invoice No.": invoices.to_numpy()})
+    right = pd.DataFrame({"Invoice No.": ids.to_numpy(), "__pos__": np.arange(len(ids))})
+    right = right.drop_duplicates(subset="Invoice No.", keep="first")
+    merged = left.merge(right, on="Invoice No.", how="left")
+    return merged["__pos__"].fillna(-1).to_numpy(dtype=np.int64)
 
-# ----------------- Scoring -----------------
-def score_producer(value) -> str:
-    if is_yes(value): return "Pass"
-    if is_failed_pattern(value) or is_no(value) or is_na(value) or norm_str(value) == "": return "Fail"
-    return "Fail"
+# ----------------- Scoring (column-wise) -----------------
+def status_from_mask(mask) -> np.ndarray:
+    return np.where(mask, "Pass", "Fail").astype(object)
 
-def score_consumer(applicable, posted) -> str:
+def score_producer(col: pd.Series) -> np.ndarray:
+    return status_from_mask(yes_mask(col))
+
+def score_consumer(applicable: pd.Series, posted: pd.Series) -> np.ndarray:
     # Consider NA/No as failing for consolidated (you asked for strict Pass-only)
-    if is_no(applicable) or is_na(applicable):
-        return "Fail"
-    if is_yes(applicable) and is_yes(posted):
-        return "Pass"
-    if is_failed_pattern(applicable) or is_failed_pattern(posted):
-        return "Fail"
-    return "Fail"
-
-def score_comparator_classic_value(val) -> str:
-    s = norm_str(val).lower()
-    if s in POS_TOKENS: return "Pass"
-    if s in NEG_TOKENS or is_failed_pattern(s): return "Fail"
-    return "Fail"
-
-def score_comparator_json_status(status_val) -> str:
-    s = norm_str(status_val).lower()
-    if s in POS_TOKENS: return "Pass"
-    if s in NEG_TOKENS or is_failed_pattern(s): return "Fail"
-    return "Fail"
-
-def score_all_yes(row: pd.Series, id_col: str) -> str:
-    for c in non_id_columns(row, id_col):
-        if not is_yes(row[c]):
-            return "Fail"
-    return "Pass"
+    return status_from_mask(yes_mask(applicable) & yes_mask(posted))
+
+def score_comparator_classic_value(col: pd.Series) -> np.ndarray:
+    return status_from_mask(yes_mask(col))
+
+def score_comparator_json_status(col: pd.Series) -> np.ndarray:
+    return status_from_mask(yes_mask(col))
+
+def score_all_yes(df: pd.DataFrame, positions: List[int]) -> np.ndarray:
+    ok = np.ones(len(df), dtype=bool)
+    for i in positions:
+        if not ok.any():
+            break  # every row already failed; remaining columns can't change that
+        ok &= yes_mask(df.iloc[:, i])
+    return status_from_mask(ok)
 
 # --- New Relic specifics ---
-def _is_flag_value(v: str) -> bool:
-    s = norm_str(v).lower()
-    if s == "":
-        return False
-    return (s in POS_TOKENS) or (s in {"na","n/a","not applicable","no","n","false","0","fail","failed"}) or is_failed_pattern(s)
-
-def score_newrelic_row(row: pd.Series, id_col: str) -> str:
-    saw_positive = False
-    for c in non_id_columns(row, id_col):
-        s = norm_str(row[c]).lower()
-        if not _is_flag_value(s):
-            continue
-        if is_failed_pattern(s) or s in {"no","n","false","0","fail","failed","na","n/a","not applicable"}:
-            return "Fail"
-        if s in POS_TOKENS:
-            saw_positive = True
-    return "Pass" if saw_positive else "Fail"
-
-# --- Extract explicit failure reasons (supports failed-str{...}) ---
-_BRACED_FAIL = re.compile(r"""^fail(?:ed)?[-_\s]?[a-z]*\{(.*?)\}""", re.IGNORECASE | re.DOTALL)
-
-def maybe_reason_from_value(value: str) -> Optional[str]:
-    raw = norm_str(value)
-    if not raw:
-        return None
-    low = raw.lower()
-    m = _BRACED_FAIL.match(raw)
-    if m:
-        return m.group(1).strip()
-    if low.startswith("failed") or low.startswith("fail-"):
-        after = re.sub(r"^fail(?:ed)?[:\-\s_]*", "", raw, flags=re.IGNORECASE).strip()
-        return after if after else raw
-    if low.startswith("error") or low.startswith("exception"):
-        return raw
-    return None
+def score_newrelic(df: pd.DataFrame, positions: List[int]) -> np.ndarray:
+    # Pass only if no column carries a failing flag and at least one is positive
+    saw_positive = np.zeros(len(df), dtype=bool)
+    saw_fail = np.zeros(len(df), dtype=bool)
+    for i in positions:
+        classes = classify_column(df.iloc[:, i])
+        saw_fail |= np.isin(classes, FAILING)
+        saw_positive |= classes == PASS
+    return status_from_mask(saw_positive & ~saw_fail)
+
+# --- Failure reasons ---
+def add_reasons(reasons: List[List[str]], col: pd.Series, label: str, rows=None) -> None:
+    """Append `label=<reason>` to reasons[i] for every row i (or only `rows`) whose cell carries one."""
+    candidates = reason_candidates(col)
+    if rows is not None:
+        in_rows = np.zeros(len(col), dtype=bool)
+        in_rows[rows] = True
+        candidates = candidates & in_rows
+    vals = col.to_numpy(dtype=object)
+    for i in np.flatnonzero(candidates):
+        rr = maybe_reason_from_value(vals[i])
+        if rr:
+            reasons[i].append(f"{label}={rr}")
+
+# ----------------- Per-file evaluation -----------------
+def eval_frame_for_kind(kind: str, df: pd.DataFrame, id_col: str) -> Tuple[np.ndarray, List[List[str]]]:
+    """
+    Scores every row of df at once.
+    Returns (status per row, reasons per row), both in df's row order.
+    Columns are addressed by position, so colliding (stripped) headers are each scored.
+    """
+    cols = list(df.columns)
+    non_id = [i for i, c in enumerate(cols) if c != id_col]
+    reasons: List[List[str]] = [[] for _ in range(len(df))]
+
+    def first(pred) -> Optional[int]:
+        return next((i for i, c in enumerate(cols) if pred(c.lower())), None)
 
-# ----------------- Per-row evaluation -----------------
-def eval_row_for_kind(kind: str, row: Optional[pd.Series], id_col: Optional[str]) -> Tuple[str, List[str]]:
-    reasons: List[str] = []
-    if row is None or id_col is None:
-        return ("Fail", reasons)
+    def col(i: int) -> pd.Series:
+        return df.iloc[:, i]
 
     if kind == "producer":
-        pcol = next((c for c in row.index if c.lower().startswith("posted_to_producer_topic")), None)
-        val = row[pcol] if pcol else None
-        status = score_producer(val)
-        rtxt = maybe_reason_from_value(val)
-        if rtxt:
-            reasons.append(f"{pcol or 'Posted_To_Producer_Topic?'}={rtxt}")
-        return (status, reasons)
+        pcol = first(lambda cl: cl.startswith("posted_to_producer_topic"))
+        if pcol is None:
+            return (status_from_mask(np.zeros(len(df), dtype=bool)), reasons)
+        add_reasons(reasons, col(pcol), cols[pcol])
+        return (score_producer(col(pcol)), reasons)
 
     if kind == "consumer":
-        app_col = next((c for c in row.index if "applicable_for_consumer_topic" in c.lower()), None)
-        post_col = next((c for c in row.index if "posted_to_consumer_topic" in c.lower()), None)
-        app_val = row[app_col] if app_col else None
-        post_val = row[post_col] if post_col else None
-        status = score_consumer(app_val, post_val)
-        for col_name, cell in ((app_col or "Applicable", app_val), (post_col or "Posted", post_val)):
-            rr = maybe_reason_from_value(cell)
-            if rr:
-                reasons.append(f"{col_name}={rr}")
+        app_col = first(lambda cl: "applicable_for_consumer_topic" in cl)
+        post_col = first(lambda cl: "posted_to_consumer_topic" in cl)
+        if app_col is not None and post_col is not None:
+            status = score_consumer(col(app_col), col(post_col))
+        else:
+            status = status_from_mask(np.zeros(len(df), dtype=bool))
+        for i in (app_col, post_col):
+            if i is not None:
+                add_reasons(reasons, col(i), cols[i])
         return (status, reasons)
 
     if kind == "comparator":
-        cmp_col = next((c for c in row.index if "expected" in c.lower() and "observed" in c.lower() and "match" in c.lower()), None)
-        if cmp_col:
-            v = row[cmp_col]
-            status = score_comparator_classic_value(v)
-            rr = maybe_reason_from_value(v)
-            if rr:
-                reasons.append(f"{cmp_col}={rr}")
+        cmp_col = first(lambda cl: "expected" in cl and "observed" in cl and "match" in cl)
+        if cmp_col is not None:
+            status = score_comparator_classic_value(col(cmp_col))
+            add_reasons(reasons, col(cmp_col), cols[cmp_col])
         else:
-            status = score_all_yes(row, id_col)
-            if status != "Pass":
-                for c in non_id_columns(row, id_col):
-                    rr = maybe_reason_from_value(row[c])
-                    if rr:
-                        reasons.append(f"{c}={rr}")
+            status = score_all_yes(df, non_id)
+            failed = np.flatnonzero(status != "Pass")
+            for i in non_id:
+                add_reasons(reasons, col(i), cols[i], failed)
         return (status, reasons)
 
     if kind == "json_comparator":
-        status_col = next((c for c in row.index if c.lower() == "status"), None)
-        reason_col = next((c for c in row.index if c.lower() in {"reason", "details", "diff"}), None)
-        if status_col:
-            status_val = row[status_col]
-            status = score_comparator_json_status(status_val)
-            rr = maybe_reason_from_value(status_val)
-            if rr:
-                reasons.append(f"{status_col}={rr}")
-            if status != "Passed" and reason_col:
-                reason_text = norm_str(row[reason_col])
-                if reason_text:
-                    reasons.append(f"{reason_col}={reason_text}")
+        status_col = first(lambda cl: cl == "status")
+        reason_col = first(lambda cl: cl in {"reason", "details", "diff"})
+        if status_col is not None:
+            status = score_comparator_json_status(col(status_col))
+            add_reasons(reasons, col(status_col), cols[status_col])
+            if reason_col is not None:
+                reason_texts = norm_str_series(col(reason_col)).to_numpy(dtype=object)
+                for i in np.flatnonzero(status != "Passed"):
+                    if reason_texts[i]:
+                        reasons[i].append(f"{cols[reason_col]}={reason_texts[i]}")
         else:
-            status = score_all_yes(row, id_col)
-            if status != "Passed":
-                for c in non_id_columns(row, id_col):
-                    rr = maybe_reason_from_value(row[c])
-                    if rr:
-                        reasons.append(f"{c}={rr}")
+            status = score_all_yes(df, non_id)
+            failed = np.flatnonzero(status != "Passed")
+            for i in non_id:
+                add_reasons(reasons, col(i), cols[i], failed)
         return (status, reasons)
 
     # newrelic (default)
-    status = score_newrelic_row(row, id_col)
-    if status != "Pass":
-        for c in non_id_columns(row, id_col):
-            rr = maybe_reason_from_value(row[c])
-            if rr:
-                reasons.append(f"{c}={rr}")
+    status = score_newrelic(df, non_id)
+    failed = np.flatnonzero(status != "Pass")
+    for i in non_id:
+        add_reasons(reasons, col(i), cols[i], failed)
     return (status, reasons)
 
 # ----------------- Consolidated builder -----------------
+def format_reasons(label: str, reasons: List[List[str]]) -> np.ndarray:
+    """`label=[r1; r2]` per row, "" for rows without reasons."""
+    return np.array([f"{label}=[{'; '.join(r)}]" if r else "" for r in reasons], dtype=object)
+
+def join_nonempty(parts: List[np.ndarray], sep: str = "; ") -> np.ndarray:
+    """Element-wise sep.join of the non-empty strings across equally long object arrays."""
+    out = np.full(len(parts[0]) if parts else 0, "", dtype=object)
+    for part in parts:
+        out = np.where(out == "", part, np.where(part == "", out, out + sep + part))
+    return out
+
 def build_consolidated(
     prod_df: pd.DataFrame,
     files_map: Dict[str, str],
@@ -229,92 +210,61 @@ def build_consolidated(
     """
     Returns a single consolidated DataFrame across all files.
     Columns: Invoice No., producer, <file1>, <file2>, ..., Final Result, Reason
+
+    Each file is scored column-wise once, then left-joined onto the producer's
+    invoices; nothing is evaluated per (invoice, file) pair in Python.
     """
     prod_id_col = pick_id_col(list(prod_df.columns))
     if not prod_id_col:
         raise SystemExit("Could not detect Tracking/Invoice column in producer file")
 
-    # Pre-index all file DFs by normalized ID for fast lookup
-    indexed: Dict[str, Tuple[str, Optional[pd.DataFrame]]] = {}  # key -> (id_col, df_indexed_or_None)
-    kinds: Dict[str, str] = {}
-    for key, df in dfs_by_key.items():
-        kinds[key] = detect_kind_from_key(key)
-        if df is not None:
-            fid = pick_id_col(list(df.columns))
-            if fid:
-                idx = df.assign(__norm_id__=norm_id_series(df[fid])).set_index("__norm_id__", drop=True)
-                indexed[key] = (fid, idx)
-            else:
-                indexed[key] = (None, None)
-        else:
-            indexed[key] = (None, None)
-
-    # Build rows
+    invoices = norm_id_series(first_column(prod_df, prod_id_col))
     keys_in_order = list(files_map.keys())
-    rows: List[Dict[str, str]] = []
-
-    # detect producer status column once
-    p_status_col = next((c for c in prod_df.columns if c.lower().startswith("posted_to_producer_topic")), None)
-
-    for _, prow in prod_df.iterrows():
-        inv = str(prow[prod_id_col]).strip()
-        row: Dict[str, str] = {"Invoice No.": inv}
-        reasons_by_key: Dict[str, List[str]] = {}
-
-        # Producer status
-        pval = prow[p_status_col] if (p_status_col and p_status_col in prow.index) else None
-        pstatus = score_producer(pval)
-        row["producer"] = pstatus
-        pr = maybe_reason_from_value(pval)
-        if pr:
-            reasons_by_key.setdefault("producer", []).append(f"{p_status_col or 'Posted_To_Producer_Topic?'}={pr}")
-
-        # Each configured file
-        for key in keys_in_order:
-            fid, fidx = indexed.get(key, (None, None))
-            kind = kinds.get(key, "newrelic")
-
-            status = "Fail"
-            reasons: List[str] = []
-
-            if fidx is None or fid is None:
-                # file missing or ID col not found OR df was None
-                if dfs_by_key.get(key) is None:
-                    reasons.append("File missing or unreadable")
-                else:
-                    reasons.append("ID column not found")
-            else:
-                sub = fidx.loc[fidx.index == inv]
-                if sub is not None and not isinstance(sub, pd.Series) and not sub.empty:
-                    sub = sub.iloc[0]
-                if sub is None or not isinstance(sub, pd.Series):
-                    reasons.append(f"Invoice {inv} missing in {key}")
-                else:
-                    status, rs = eval_row_for_kind(kind, sub, fid)
-                    reasons.extend(rs)
-
-            row[key] = status
-            if reasons:
-                reasons_by_key.setdefault(key, []).extend(reasons)
-
-        # Final result: strict Pass-only across all status columns
-        per_cols = ["producer"] + keys_in_order
-        final_pass = all(str(row[c]).strip() == "Pass" for c in per_cols)
-        row["Final Result"] = "Pass" if final_pass else "Fail"
-
-        # Aggregate reasons into one column (key=[r1, r2; ...])
-        if reasons_by_key:
-            reason_chunks = []
-            for k, arr in reasons_by_key.items():
-                reason_chunks.append(f"{k}=[{'; '.join(arr)}]")
-            row["Reason"] = "; ".join(reason_chunks)
-        else:
-            row["Reason"] = ""
-
-        rows.append(row)
+    statuses: Dict[str, np.ndarray] = {}
+    reasons_by_key: Dict[str, np.ndarray] = {}  # formatted "key=[...]" (or "") per invoice
+    # Several keys may share one loaded DataFrame (same path); join/score each frame only once
+    aligned: Dict[Tuple[int, str], np.ndarray] = {}
+    scored: Dict[Tuple[int, str, str], Tuple[np.ndarray, List[List[str]]]] = {}
+
+    # Producer status
+    statuses["producer"], prod_reasons = eval_frame_for_kind("producer", prod_df, prod_id_col)
+    reasons_by_key["producer"] = format_reasons("producer", prod_reasons)
+
+    # Each configured file
+    for key in keys_in_order:
+        df = dfs_by_key.get(key)
+        fid = pick_id_col(list(df.columns)) if df is not None else None
+
+        if df is None or fid is None:
+            # file missing or ID col not found OR df was None
+            msg = "File missing or unreadable" if df is None else "ID column not found"
+            statuses[key] = status_from_mask(np.zeros(len(invoices), dtype=bool))
+            reasons_by_key[key] = np.full(len(invoices), f"{key}=[{msg}]", dtype=object)
+            continue
 
-    columns = ["Invoice No.", "producer"] + keys_in_order + ["Final Result", "Reason"]
-    return pd.DataFrame(rows)[columns]
+        kind = detect_kind_from_key(key)
+        if (id(df), fid, kind) not in scored:
+            scored[(id(df), fid, kind)] = eval_frame_for_kind(kind, df, fid)
+        if (id(df), fid) not in aligned:
+            aligned[(id(df), fid)] = align_ids(invoices, norm_id_series(first_column(df, fid)))
+        file_status, file_reasons = scored[(id(df), fid, kind)]
+        pos = aligned[(id(df), fid)]
+        # position -1 (invoice missing) lands on the trailing "Fail" sentinel
+        statuses[key] = np.append(file_status, "Fail")[pos]
+        missing = f"{key}=[Invoice " + invoices.to_numpy(dtype=object) + f" missing in {key}]"
+        reasons_by_key[key] = np.where(pos >= 0, np.append(format_reasons(key, file_reasons), "")[pos], missing)
+
+    # Final result: strict Pass-only across all status columns
+    per_cols = ["producer"] + keys_in_order
+    status_matrix = np.column_stack([statuses[c] for c in per_cols])
+    final_result = status_from_mask((status_matrix == "Pass").all(axis=1))
+
+    # Aggregate reasons into one column (key=[r1, r2; ...])
+    out = {"Invoice No.": invoices.to_numpy()}
+    out.update({c: statuses[c] for c in per_cols})
+    out["Final Result"] = final_result
+    out["Reason"] = join_nonempty(list(reasons_by_key.values()))
+    return pd.DataFrame(out)  # already in output column order
 
 # ----------------- Main -----------------
 def main():
@@ -323,22 +273,19 @@ def main():
     args = ap.parse_args()
 
     cfg_path = expand_env_str(args.config if args.config else "${ROOT_PATH}/config.json")
-    cfg = json.loads(read_text_any(cfg_path))
+    cfg = json_loads(read_bytes_any(cfg_path))
 
     prod_path = expand_env_str(cfg["producer"])
     files_map: Dict[str, str] = {k: expand_env_str(v) for k, v in cfg.get("files", {}).items()}
     out_dir = expand_env_str(cfg.get("output") or ".")
     out_path = out_dir.rstrip("/") + "/consolidated_report.xlsx"
 
-    # Load producer
-    df_prod = read_excel_any(prod_path)
+    # Load producer + all other files concurrently (local or gs://); shared paths are read once
+    loaded = read_excel_many([prod_path, *files_map.values()])
+    df_prod = loaded[prod_path]
     if df_prod is None:
         raise SystemExit(f"Producer file not found or unreadable: {prod_path}")
-
-    # Load all other files (local or gs://)
-    dfs_by_key: Dict[str, Optional[pd.DataFrame]] = {}
-    for key, p in files_map.items():
-        dfs_by_key[key] = read_excel_any(p)
+    dfs_by_key: Dict[str, Optional[pd.DataFrame]] = {key: loaded[p] for key, p in files_map.items()}
 
     # Build consolidated and write
     final_df = build_consolidated(df_prod, files_map, dfs_by_key)
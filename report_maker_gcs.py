@@ -1,54 +1,40 @@
 #!/usr/bin/env python3
-import json
 import os
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 import re
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 
 # --- NEW: unified local + GCS I/O ---
 from gcs_utils import (
     expand_env_str,          # expands ${ROOT_PATH}, env vars, ~ (works with gs:// too)
-    read_text_any,           # read text from local or gs://
-    read_excel_any,          # read excel from local or gs://
+    read_bytes_any,          # read raw bytes from local or gs://
+    read_excel_many,         # read several excel files concurrently (local or gs://)
     write_excel_any,         # write excel to local or gs://
     is_gcs_path,             # detect gs://
 )
 
-# ----------------- Helpers -----------------
-def norm_str(v) -> str:
-    if v is None or (isinstance(v, float) and pd.isna(v)):
-        return ""
-    return str(v).strip()
-
-# Positive / Negative token sets (case-insensitive)
-POS_TOKENS = {"yes", "y", "true", "1", "pass", "passed", "success", "ok","Yes"}
-NEG_TOKENS = {"no", "n", "false", "0", "fail", "failed", "na", "n/a", "not applicable", "none", ""}
-
-def is_yes(v: str) -> bool:
-    return norm_str(v).lower() in POS_TOKENS
-
-def is_no(v: str) -> bool:
-    s = norm_str(v).lower()
-    return s in NEG_TOKENS
-
-def is_na(v: str) -> bool:
-    return norm_str(v).lower() in {"na", "n/a", "not applicable", "none", ""}
+# --- shared cell / flag / reason helpers ---
+from report_common import (
+    json_loads, norm_str, norm_id_series, first_column,
+    PASS, NA, MISSING, FAILING, classify, classify_column,
+    maybe_reason_from_value, reason_candidates,
+)
 
-def is_failed_pattern(v: str) -> bool:
-    s = norm_str(v).lower()
-    return s.startswith("failed-") or s.startswith("fail-") or s.startswith("error") or s.startswith("exception")
+# ----------------- Helpers -----------------
+_PREFERRED_ID_COLS = (
+    "Tracking_ID_OR_Unique_Key","Tracking_ID","Unique_Key",
+    "Invoice No.","Invoice_No","Invoice","Tracking ID",
+)
 
 def pick_id_col(cols: List[str]) -> Optional[str]:
-    preferred = [
-        "Tracking_ID_OR_Unique_Key","Tracking_ID","Unique_Key",
-        "Invoice No.","Invoice_No","Invoice","Tracking ID",
-    ]
     exact = {c.strip(): c for c in cols}
-    for p in preferred:
+    for p in _PREFERRED_ID_COLS:
         if p in exact: return exact[p]
     for c in cols:
-        cl = c.lower().replace("_", " ")
+        cl = c.lower()  # keywords contain no "_"/" ", so no separator normalisation needed
         if "invoice" in cl or "tracking" in cl or "unique" in cl:
             return c
     return None
@@ -69,288 +55,390 @@ def detect_kind_from_key(key: str) -> str:
         return "newrelic"
     return "newrelic"
 
-def non_id_columns(row: pd.Series, id_col: str) -> List[str]:
-    return [c for c in row.index if c != id_col]
+class RowView:
+    """
+    One row of a column-array snapshot: row[i] reads the cell in column position i
+    and row.label(i) is that column's header, so nothing is copied per row.
+    """
+    __slots__ = ("_arrays", "_labels", "_pos")
+
+    def __init__(self, arrays: List[np.ndarray], labels: List[str], pos: int):
+        self._arrays = arrays
+        self._labels = labels
+        self._pos = pos
+
+    def __getitem__(self, i: int):
+        return self._arrays[i][self._pos]
+
+    def label(self, i: int) -> str:
+        return self._labels[i]
+
+def column_arrays(df: pd.DataFrame) -> List[np.ndarray]:
+    """
+    Object-array snapshot of df, one per column position. Positions rather than
+    labels, since stripped headers can collide ("Flag" / "Flag ").
+    """
+    return [df.iloc[:, i].to_numpy(dtype=object) for i in range(df.shape[1])]
+
+def non_id_positions(cols, id_col: str) -> List[int]:
+    return [i for i, c in enumerate(cols) if c != id_col]
 
 # --- Robust ID matching ---
-def norm_id_series(s: pd.Series) -> pd.Series:
-    return s.astype(str).map(lambda x: str(x).strip())
-
-def first_row_for_id(df: pd.DataFrame, id_col: str, id_val) -> Optional[pd.Series]:
-    try:
-        sub = df.loc[norm_id_series(df[id_col]) == str(id_val).strip()]
-        if not sub.empty:
-            return sub.iloc[0]
-    except Exception:
-        pass
-    return None
+def build_id_index(s: pd.Series) -> Dict[str, int]:
+    """Map each normalized ID to the position of its first row (O(1) lookups)."""
+    ids = norm_id_series(s).tolist()
+    # built back to front so the first row of a duplicated ID is the one kept
+    return dict(zip(reversed(ids), range(len(ids) - 1, -1, -1)))
 
 # ----------------- Scoring -----------------
 def score_producer(value) -> str:
-    if is_yes(value): return "Pass"
-    if is_failed_pattern(value) or is_no(value) or is_na(value) or norm_str(value) == "": return "Fail"
-    return "Fail"
+    # anything but a positive flag (no/NA/blank/failed-...) fails
+    return "Pass" if classify(value) == PASS else "Fail"
+
+def score_producer_column(col: pd.Series) -> np.ndarray:
+    """score_producer over a whole column at once."""
+    return np.where(classify_column(col) == PASS, "Pass", "Fail").astype(object)
 
 def score_consumer(applicable, posted) -> str:
-    if is_no(applicable) or is_na(applicable):
-        return "Fail"
-    if is_yes(applicable) and is_yes(posted):
+    if classify(applicable) == PASS and classify(posted) == PASS:
         return "Pass"
-    if is_failed_pattern(applicable) or is_failed_pattern(posted):
-        return "Fail"
     return "Fail"
 
-def score_comparator_classic_value(val) -> str:
-    s = norm_str(val).lower()
-    if s in POS_TOKENS: return "Pass"
-    if s in {"na", "n/a", "missing"}: return "NA"
-    if s in NEG_TOKENS or is_failed_pattern(s): return "Fail"
-    return "Fail"
+def score_comparator_classic_column(col: pd.Series) -> np.ndarray:
+    """Expected/observed match column: Pass on a positive token, NA on na/n/a/missing, else Fail."""
+    classes = classify_column(col)
+    return np.select(
+        [classes == PASS, np.isin(classes, (NA, MISSING))],
+        ["Pass", "NA"],
+        default="Fail",
+    ).astype(object)
+
+def score_comparator_json_status_column(col: pd.Series) -> np.ndarray:
+    """Strict Status column: Pass only on a positive token."""
+    return score_producer_column(col)  # same rule as the producer flag
+
+def classify_block(df: pd.DataFrame, positions: List[int]) -> np.ndarray:
+    """(rows x positions) int8 class matrix, built one column at a time."""
+    if not positions:
+        return np.empty((len(df), 0), dtype=np.int8)
+    return np.column_stack([classify_column(df.iloc[:, i]) for i in positions])
+
+def score_all_yes_rows(classes: np.ndarray) -> np.ndarray:
+    """Pass where every non-ID cell of the (rows x non-ID columns) class matrix is positive."""
+    ok = (classes == PASS).all(axis=1)
+    return np.where(ok, "Pass", "Fail").astype(object)
 
-def score_comparator_json_status(status_val) -> str:
-    s = norm_str(status_val).lower()
-    if s in POS_TOKENS: return "Pass"
-    if s in NEG_TOKENS or is_failed_pattern(s): return "Fail"
-    return "Fail"
+# --- New Relic specifics ---
+def score_newrelic_rows(classes: np.ndarray) -> np.ndarray:
+    """
+    Pass where a row of the (rows x non-ID columns) class matrix has at least one
+    positive flag and no failing one (no/NA/failed-...); blanks and free text are neutral.
+    """
+    ok = (classes == PASS).any(axis=1) & ~np.isin(classes, FAILING).any(axis=1)
+    return np.where(ok, "Pass", "Fail").astype(object)
+
+# --- Failure reasons ---
+def cell_reasons(row, positions: List[int]) -> List[str]:
+    """`col=<reason>` for each of the row's cells at positions that carries a failure reason."""
+    return [f"{row.label(i)}={rr}" for i in positions if (rr := maybe_reason_from_value(row[i]))]
+
+def reasons_for_column(col: pd.Series, label: str) -> np.ndarray:
+    """`label=<reason>` per cell that carries one, "" elsewhere."""
+    out = np.full(len(col), "", dtype=object)
+    candidates = reason_candidates(col)
+    vals = col.to_numpy(dtype=object)
+    for i in np.flatnonzero(candidates):
+        rr = maybe_reason_from_value(vals[i])
+        if rr:
+            out[i] = f"{label}={rr}"
+    return out
+
+# ----------------- Row evaluation per kind -----------------
+def resolve_columns(cols) -> Dict[str, Optional[int]]:
+    """
+    Position of the first column playing each role the row handlers need (None if absent).
+    Resolved once per file and passed to every handler call.
+    """
+    lowered = [c.lower() for c in cols]
 
-def score_all_yes(row: pd.Series, id_col: str) -> str:
-    for c in non_id_columns(row, id_col):
-        if not is_yes(row[c]):
-            return "Fail"
-    return "Pass"
+    def first(pred) -> Optional[int]:
+        return next((i for i, cl in enumerate(lowered) if pred(cl)), None)
 
-# --- New Relic specifics ---
-def _is_flag_value(v: str) -> bool:
-    s = norm_str(v).lower()
-    if s == "":
-        return False
-    return (s in POS_TOKENS) or (s in {"na","n/a","not applicable","no","n","false","0","fail","failed"}) or is_failed_pattern(s)
-
-def score_newrelic_row(row: pd.Series, id_col: str) -> str:
-    saw_positive = False
-    for c in non_id_columns(row, id_col):
-        s = norm_str(row[c]).lower()
-        if not _is_flag_value(s):
-            continue
-        if is_failed_pattern(s) or s in {"no","n","false","0","fail","failed","na","n/a","not applicable"}:
-            return "Fail"
-        if s in POS_TOKENS:
-            saw_positive = True
-    return "Pass" if saw_positive else "Fail"
-
-# --- Extract explicit failure reasons (supports failed-str{...}) ---
-_BRACED_FAIL = re.compile(r"""^fail(?:ed)?[-_\s]?[a-z]*\{(.*?)\}""", re.IGNORECASE | re.DOTALL)
-
-def maybe_reason_from_value(value: str) -> Optional[str]:
-    raw = norm_str(value)
-    if not raw:
+    return {
+        "producer": first(lambda cl: cl.startswith("posted_to_producer_topic")),
+        "applicable": first(lambda cl: "applicable_for_consumer_topic" in cl),
+        "posted": first(lambda cl: "posted_to_consumer_topic" in cl),
+        "compare": first(lambda cl: "expected" in cl and "observed" in cl and "match" in cl),
+        "status": first(lambda cl: cl == "status"),
+        "reason": first(lambda cl: cl in {"reason", "details", "diff"}),
+    }
+
+def score_file_rows(kind: str, df: pd.DataFrame, non_id: List[int], roles: Dict[str, Optional[int]]) -> Optional[np.ndarray]:
+    """
+    Status of every row of df for the comparator / New Relic kinds, scored column-wise
+    (None for kinds that are scored per row).
+    """
+    if kind in {"producer", "consumer"}:
         return None
-    low = raw.lower()
-    m = _BRACED_FAIL.match(raw)
-    if m:
-        return m.group(1).strip()
-    if low.startswith("failed") or low.startswith("fail-"):
-        after = re.sub(r"^fail(?:ed)?[:\-\s_]*", "", raw, flags=re.IGNORECASE).strip()
-        return after if after else raw
-    if low.startswith("error") or low.startswith("exception"):
-        return raw
-    return None
+    if kind == "comparator" and roles["compare"] is not None:
+        return score_comparator_classic_column(df.iloc[:, roles["compare"]])
+    if kind in {"json_comparator", "file_comparator"} and roles["status"] is not None:
+        return score_comparator_json_status_column(df.iloc[:, roles["status"]])
+    classes = classify_block(df, non_id)
+    if kind in {"comparator", "json_comparator", "file_comparator"}:
+        return score_all_yes_rows(classes)
+    return score_newrelic_rows(classes)
+
+Roles = Dict[str, Optional[int]]
+
+def _eval_producer(row, non_id: List[int], roles: Roles, row_status: Optional[str]) -> Tuple[str, List[str]]:
+    reasons: List[str] = []
+    pcol = roles["producer"]
+    val = row[pcol] if pcol is not None else None
+    status = score_producer(val)
+    rtxt = maybe_reason_from_value(val)
+    if rtxt:
+        reasons.append(f"{row.label(pcol) if pcol is not None else 'Posted_To_Producer_Topic?'}={rtxt}")
+    return (status, reasons)
 
-# ----------------- Row evaluation per kind -----------------
-def eval_row_for_kind(kind: str, row: Optional[pd.Series], id_col: Optional[str]) -> Tuple[str, List[str]]:
+def _eval_consumer(row, non_id: List[int], roles: Roles, row_status: Optional[str]) -> Tuple[str, List[str]]:
     reasons: List[str] = []
-    if row is None or id_col is None:
-        return ("Fail", reasons)
-
-    if kind == "producer":
-        pcol = next((c for c in row.index if c.lower().startswith("posted_to_producer_topic")), None)
-        val = row[pcol] if pcol else None
-        status = score_producer(val)
-        rtxt = maybe_reason_from_value(val)
-        if rtxt:
-            reasons.append(f"{pcol or 'Posted_To_Producer_Topic?'}={rtxt}")
-        return (status, reasons)
-
-    if kind == "consumer":
-        app_col = next((c for c in row.index if "applicable_for_consumer_topic" in c.lower()), None)
-        post_col = next((c for c in row.index if "posted_to_consumer_topic" in c.lower()), None)
-        app_val = row[app_col] if app_col else None
-        post_val = row[post_col] if post_col else None
-        status = score_consumer(app_val, post_val)
-        for col_name, cell in ((app_col or "Applicable", app_val), (post_col or "Posted", post_val)):
-            rr = maybe_reason_from_value(cell)
-            if rr:
-                reasons.append(f"{col_name}={rr}")
-        return (status, reasons)
-
-    if kind == "comparator":
-        cmp_col = next((c for c in row.index if "expected" in c.lower() and "observed" in c.lower() and "match" in c.lower()), None)
-        if cmp_col:
-            v = row[cmp_col]
-            status = score_comparator_classic_value(v)
-            rr = maybe_reason_from_value(v)
-            if rr:
-                reasons.append(f"{cmp_col}={rr}")
-        else:
-            status = score_all_yes(row, id_col)
-            if status != "Pass":
-                for c in non_id_columns(row, id_col):
-                    rr = maybe_reason_from_value(row[c])
-                    if rr:
-                        reasons.append(f"{c}={rr}")
-        return (status, reasons)
-
-    if kind in {"json_comparator", "file_comparator"}:
-        # Prefer strict 'Status' / then add 'reason/details/diff' if provided
-        status_col = next((c for c in row.index if c.lower() == "status"), None)
-        reason_col = next((c for c in row.index if c.lower() in {"reason", "details", "diff"}), None)
-        if status_col:
-            status_val = row[status_col]
-            status = score_comparator_json_status(status_val)
-            rr = maybe_reason_from_value(status_val)
-            if rr:
-                reasons.append(f"{status_col}={rr}")
-            if status != "Pass" and reason_col:
-                reason_text = norm_str(row[reason_col])
-                if reason_text:
-                    reasons.append(f"{reason_col}={reason_text}")
-        else:
-            status = score_all_yes(row, id_col)
-            if status != "Pass":
-                for c in non_id_columns(row, id_col):
-                    rr = maybe_reason_from_value(row[c])
-                    if rr:
-                        reasons.append(f"{c}={rr}")
-        return (status, reasons)
-
-    # newrelic (default)
-    status = score_newrelic_row(row, id_col)
-    if status != "Pass":
-        for c in non_id_columns(row, id_col):
-            rr = maybe_reason_from_value(row[c])
-            if rr:
-                reasons.append(f"{c}={rr}")
+    app_col = roles["applicable"]
+    post_col = roles["posted"]
+    app_val = row[app_col] if app_col is not None else None
+    post_val = row[post_col] if post_col is not None else None
+    status = score_consumer(app_val, post_val)
+    for col, fallback, cell in ((app_col, "Applicable", app_val), (post_col, "Posted", post_val)):
+        rr = maybe_reason_from_value(cell)
+        if rr:
+            reasons.append(f"{row.label(col) if col is not None else fallback}={rr}")
     return (status, reasons)
 
+def _eval_all_yes(row, non_id: List[int], row_status: str) -> Tuple[str, List[str]]:
+    if row_status != "Pass":
+        return (row_status, cell_reasons(row, non_id))
+    return (row_status, [])
+
+def _eval_comparator(row, non_id: List[int], roles: Roles, row_status: str) -> Tuple[str, List[str]]:
+    cmp_col = roles["compare"]
+    if cmp_col is None:
+        return _eval_all_yes(row, non_id, row_status)
+    reasons: List[str] = []
+    rr = maybe_reason_from_value(row[cmp_col])
+    if rr:
+        reasons.append(f"{row.label(cmp_col)}={rr}")
+    return (row_status, reasons)
+
+def _eval_json_comparator(row, non_id: List[int], roles: Roles, row_status: str) -> Tuple[str, List[str]]:
+    # Prefer strict 'Status' / then add 'reason/details/diff' if provided
+    status_col = roles["status"]
+    reason_col = roles["reason"]
+    if status_col is None:
+        return _eval_all_yes(row, non_id, row_status)
+    reasons: List[str] = []
+    rr = maybe_reason_from_value(row[status_col])
+    if rr:
+        reasons.append(f"{row.label(status_col)}={rr}")
+    if row_status != "Pass" and reason_col is not None:
+        reason_text = norm_str(row[reason_col])
+        if reason_text:
+            reasons.append(f"{row.label(reason_col)}={reason_text}")
+    return (row_status, reasons)
+
+def _eval_newrelic(row, non_id: List[int], roles: Roles, row_status: str) -> Tuple[str, List[str]]:
+    return _eval_all_yes(row, non_id, row_status)
+
+RowHandler = Callable[..., Tuple[str, List[str]]]
+
+_KIND_HANDLERS: Dict[str, RowHandler] = {
+    "producer": _eval_producer,
+    "consumer": _eval_consumer,
+    "comparator": _eval_comparator,
+    "json_comparator": _eval_json_comparator,
+    "file_comparator": _eval_json_comparator,
+}
+
+def kind_handler(kind: str) -> RowHandler:
+    """Row evaluator for a kind; unknown kinds are scored like newrelic."""
+    return _KIND_HANDLERS.get(kind, _eval_newrelic)
+
 # ----------------- Report writer (local or GCS) -----------------
-def write_single_report(df: pd.DataFrame, out_path: str) -> None:
+def write_single_report(df: pd.DataFrame, out_path: str) -> str:
     """
-    Writes a single-sheet Excel named by out_path (supports local and gs://).
+    Writes a single-sheet Excel named by out_path (supports local and gs://); returns the path.
     """
     write_excel_any({"Report": df}, out_path)
-    print(out_path)
+    return out_path
 
-def join_out_path(out_dir: str, filename: str) -> str:
+_SHEET_NAME_BAD = re.compile(r"[\[\]:*?/\\]")
+
+def sheet_name_for(key: str, used: set) -> str:
+    """
+    Excel-safe, unique (case-insensitively, as Excel compares them) sheet name
+    of at most 31 characters for a report key; records it in `used`.
+    Excel also rejects names that start or end with an apostrophe.
     """
-    Join a filename to an output dir that may be local or gs://.
+    base = _SHEET_NAME_BAD.sub("_", key).strip("'")[:31].rstrip("'") or "Sheet"
+    name, n = base, 1
+    while name.lower() in used:
+        n += 1
+        suffix = f"~{n}"
+        name = base[: 31 - len(suffix)] + suffix
+    used.add(name.lower())
+    return name
+
+def make_out_joiner(out_dir: str) -> Callable[[str], str]:
+    """
+    filename -> path inside out_dir, which may be local or gs:// (decided once per run).
     """
     if is_gcs_path(out_dir):
-        return out_dir.rstrip("/") + "/" + filename
-    # local
-    return os.path.join(out_dir, filename)
+        prefix = out_dir.rstrip("/") + "/"
+        return lambda filename: prefix + filename
+    return lambda filename: os.path.join(out_dir, filename)
 
 # ----------------- Build one report -----------------
-def build_report_for_file(
+def make_report_for_file(
     key: str,
-    path_str: str,
     kind: str,
     df_file: Optional[pd.DataFrame],
-    prod_df: pd.DataFrame,
-    prod_id_col: str,
-    out_dir: str,
-) -> None:
-    report_rows: List[Dict[str, str]] = []
+    prod_ids: np.ndarray,
+    id_index_cache: Dict[Tuple[int, str], Dict[str, int]],
+) -> pd.DataFrame:
+    """
+    Producer-keyed report frame (Invoice No., Status, Reason) for one configured file.
+    prod_ids are the normalized producer IDs; frames shared by several keys (same
+    path) are ID-indexed once through id_index_cache.
+    """
     file_read_ok = df_file is not None
     file_id_col = pick_id_col(list(df_file.columns)) if df_file is not None else None
 
     file_df = df_file if df_file is not None else pd.DataFrame()
+    labels = list(file_df.columns)
+    roles = resolve_columns(labels)
+    non_id = non_id_positions(labels, file_id_col)
+    id_index: Dict[str, int] = {}
+    arrays = column_arrays(file_df)  # rows are read cell by cell from these, never materialized
+    if file_read_ok and file_id_col:
+        cache_key = (id(df_file), file_id_col)
+        id_index = id_index_cache.get(cache_key)
+        if id_index is None:
+            id_index = id_index_cache[cache_key] = build_id_index(first_column(file_df, file_id_col))
+
+    handler = kind_handler(kind)  # kind dispatch once per file, not per row
+    # comparator / New Relic statuses for every file row at once, not cell by cell
+    block_status: Optional[np.ndarray] = None
     if file_read_ok and file_id_col:
-        file_df = file_df.assign(__norm_id__=norm_id_series(file_df[file_id_col])).set_index("__norm_id__", drop=True)
-
-    for _, prow in prod_df.iterrows():
-        inv = str(prow[prod_id_col]).strip()
-        reason_list: List[str] = []
-        status: str = "Fail"
-
-        file_row: Optional[pd.Series] = None
-        if not file_read_ok:
-            reason_list.append("File missing or unreadable")
-        elif not file_id_col:
-            reason_list.append("ID column not found")
-        else:
-            file_row = file_df.loc[file_df.index == inv]
-            if file_row is not None and not isinstance(file_row, pd.Series) and not file_row.empty:
-                file_row = file_row.iloc[0]
-            if file_row is None or (not isinstance(file_row, pd.Series)):
-                reason_list.append(f"Invoice {inv} missing in {key}")
-
-        if file_row is not None and isinstance(file_row, pd.Series):
-            st, rs = eval_row_for_kind(kind, file_row, file_id_col)
-            status = st
-            reason_list.extend(rs)
-        else:
-            status = "Fail"
-
-        report_rows.append({
-            "Invoice No.": inv,
-            "Status": status,
-            "Reason": "; ".join(reason_list) if reason_list else "",
-        })
-
-    out_path = join_out_path(out_dir, f"{key}_report.xlsx")
-    write_single_report(pd.DataFrame(report_rows, columns=["Invoice No.", "Status", "Reason"]), out_path)
+        block_status = score_file_rows(kind, file_df, non_id, roles)
+
+    n = len(prod_ids)
+    status = np.full(n, "Fail", dtype=object)
+    if not file_read_ok or not file_id_col:
+        reason = np.full(n, "File missing or unreadable" if not file_read_ok else "ID column not found", dtype=object)
+        return pd.DataFrame({"Invoice No.": prod_ids, "Status": status, "Reason": reason})
+
+    # file row per producer ID (-1 = missing); each matched file row is evaluated and its
+    # reasons joined once, then both columns are filled by fancy indexing
+    hit = np.fromiter((id_index.get(inv, -1) for inv in prod_ids), dtype=np.int64, count=n)
+    found = hit >= 0
+    rows_status = np.empty(len(file_df), dtype=object)
+    rows_reason = np.empty(len(file_df), dtype=object)
+    for pos in np.unique(hit[found]).tolist():
+        row_status = block_status[pos] if block_status is not None else None
+        st, rs = handler(RowView(arrays, labels, pos), non_id, roles, row_status)
+        rows_status[pos] = st
+        rows_reason[pos] = "; ".join(rs)
+
+    reason = np.empty(n, dtype=object)
+    status[found] = rows_status[hit[found]]
+    reason[found] = rows_reason[hit[found]]
+    reason[~found] = [f"Invoice {inv} missing in {key}" for inv in prod_ids[~found]]
+    return pd.DataFrame({"Invoice No.": prod_ids, "Status": status, "Reason": reason})
+
+def build_report_for_file(
+    key: str,
+    kind: str,
+    df_file: Optional[pd.DataFrame],
+    prod_ids: np.ndarray,
+    id_index_cache: Dict[Tuple[int, str], Dict[str, int]],
+    out_joiner: Callable[[str], str],
+) -> str:
+    """Builds and writes <key>_report.xlsx; returns its path."""
+    report = make_report_for_file(key, kind, df_file, prod_ids, id_index_cache)
+    return write_single_report(report, out_joiner(f"{key}_report.xlsx"))
 
 # ----------------- Main -----------------
 def main():
     ap = argparse.ArgumentParser(description="Make individual reports per file (producer keyed)")
     ap.add_argument("--config", help="Path to config JSON (defaults to ${ROOT_PATH}/config.json)")
+    ap.add_argument("--single-workbook", action="store_true",
+                    help="Write every report as a sheet of one all_reports.xlsx instead of one file per key")
     args = ap.parse_args()
 
     cfg_path = expand_env_str(args.config if args.config else "${ROOT_PATH}/config.json")
-    cfg_text = read_text_any(cfg_path)  # works for local and gs://
-    cfg = json.loads(cfg_text)
+    cfg = json_loads(read_bytes_any(cfg_path))  # works for local and gs://
 
     prod_path = expand_env_str(cfg["producer"])
     files_map: Dict[str, str] = {k: expand_env_str(v) for k, v in cfg.get("files", {}).items()}
     out_dir = expand_env_str(cfg.get("output") or ".")
+    out_joiner = make_out_joiner(out_dir)
+
+    # Load producer + every file concurrently (local or gs://); shared paths are read once
+    loaded = read_excel_many([prod_path, *files_map.values()])
 
-    # Load producer and find IDs (from local or gs://)
-    df_prod = read_excel_any(prod_path)
+    # Producer IDs
+    df_prod = loaded[prod_path]
     if df_prod is None:
         raise SystemExit(f"Producer file not found or unreadable: {prod_path}")
     prod_id_col = pick_id_col(list(df_prod.columns))
     if not prod_id_col:
         raise SystemExit("Could not detect Tracking/Invoice column in producer file")
 
-    # Producer-only report
-    prod_rows: List[Dict[str, str]] = []
-    p_status_col = next((c for c in df_prod.columns if c.lower().startswith("posted_to_producer_topic")), None)
-    for _, prow in df_prod.iterrows():
-        inv = str(prow[prod_id_col]).strip()
-        val = prow[p_status_col] if (p_status_col and p_status_col in prow.index) else None
-        status = score_producer(val)
-        reason = maybe_reason_from_value(val)
-        prod_rows.append({
-            "Invoice No.": inv,
-            "Status": status,
-            "Reason": (f"{p_status_col or 'Posted_To_Producer_Topic?'}={reason}" if reason else "")
-        })
-    prod_out = join_out_path(out_dir, "producer_report.xlsx")
-    write_single_report(pd.DataFrame(prod_rows, columns=["Invoice No.", "Status", "Reason"]), prod_out)
-
-    # Per-file reports (each key → 1 XLSX)
-    for key, pstr in files_map.items():
-        kind = detect_kind_from_key(key)
-        df_f = read_excel_any(pstr)  # local or gs://
-        build_report_for_file(
-            key=key,
-            path_str=pstr,
-            kind=kind,
-            df_file=df_f,
-            prod_df=df_prod,
-            prod_id_col=prod_id_col,
-            out_dir=out_dir,
-        )
+    # Producer-only report, scored column-wise
+    p_status_col = resolve_columns(df_prod.columns)["producer"]
+    prod_ids = norm_id_series(first_column(df_prod, prod_id_col)).to_numpy(dtype=object)
+    if p_status_col is not None:
+        prod_status = score_producer_column(df_prod.iloc[:, p_status_col])
+        prod_reasons = reasons_for_column(df_prod.iloc[:, p_status_col], df_prod.columns[p_status_col])
+    else:  # no status column: nothing can pass, and there is no cell to explain why
+        prod_status = np.full(len(df_prod), "Fail", dtype=object)
+        prod_reasons = np.full(len(df_prod), "", dtype=object)
+    prod_out = out_joiner("producer_report.xlsx")
+    prod_report = pd.DataFrame({"Invoice No.": prod_ids, "Status": prod_status, "Reason": prod_reasons})
+
+    id_index_cache: Dict[Tuple[int, str], Dict[str, int]] = {}
+    shared = dict(prod_ids=prod_ids, id_index_cache=id_index_cache)
+
+    if args.single_workbook:
+        # One workbook, one sheet per report: a single xlsx write / upload for the whole run
+        with ThreadPoolExecutor(max_workers=max(1, min(8, len(files_map)))) as ex:
+            frames = {
+                key: ex.submit(make_report_for_file, key, detect_kind_from_key(key), loaded[pstr], **shared)
+                for key, pstr in files_map.items()
+            }
+            used: set = set()
+            sheets = {sheet_name_for("producer", used): prod_report}
+            for key, fut in frames.items():
+                sheets[sheet_name_for(key, used)] = fut.result()
+        all_out = out_joiner("all_reports.xlsx")
+        write_excel_any(sheets, all_out)
+        print(all_out)
+        return
+
+    # Producer + per-file reports (each key → 1 XLSX) are independent: build and write
+    # them concurrently so uploads overlap, then print paths in config order
+    with ThreadPoolExecutor(max_workers=min(8, len(files_map) + 1)) as ex:
+        futures = [ex.submit(write_single_report, prod_report, prod_out)]
+        for key, pstr in files_map.items():
+            futures.append(ex.submit(
+                build_report_for_file,
+                key=key,
+                kind=detect_kind_from_key(key),
+                df_file=loaded[pstr],
+                out_joiner=out_joiner,
+                **shared,
+            ))
+        for fut in futures:
+            print(fut.result())
 
 if __name__ == "__main__":
     main()